@@ -2,7 +2,6 @@
 
 import sys
 import logging
-import uvicorn
 
 from ticktick_mcp import config
 
@@ -61,6 +61,10 @@ class TickTickClientSingleton:
     @classmethod
     def get_client(cls) -> Optional[TickTickClient]:
         """Returns the initialized TickTick client instance."""
+        # Fast path: once initialized successfully the client never changes
+        client = cls._instance
+        if client is not None:
+            return client
         if not cls._initialized:
             cls() # Ensure __init__ is called if not already initialized
         if cls._instance is None:
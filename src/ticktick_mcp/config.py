@@ -1,4 +1,5 @@
 import argparse
+import io
 import logging
 import os
 import sys
@@ -42,24 +43,32 @@ except OSError as e:
 # Construct the full path to the .env file
 dotenv_path = dotenv_dir_path / ".env"
 
-# Check if the .env file exists in the target directory
-if not dotenv_path.is_file():
-    logging.error(f"Required .env file not found at {dotenv_path}")
-    logging.error("Please create the .env file with your TickTick credentials.")
-    logging.error("Expected content:")
-    logging.error("  TICKTICK_CLIENT_ID=your_client_id")
-    logging.error("  TICKTICK_CLIENT_SECRET=your_client_secret")
-    logging.error("  TICKTICK_REDIRECT_URI=your_redirect_uri")
-    logging.error("  TICKTICK_USERNAME=your_ticktick_email")
-    logging.error("  TICKTICK_PASSWORD=your_ticktick_password")
+# Read the .env file once; a missing file is detected from the read itself rather than
+# a separate existence check followed by a second open inside load_dotenv
+try:
+    dotenv_content = dotenv_path.read_text(encoding="utf-8")
+except (FileNotFoundError, IsADirectoryError):
+    logging.error("\n".join([
+        f"Required .env file not found at {dotenv_path}",
+        "Please create the .env file with your TickTick credentials.",
+        "Expected content:",
+        "  TICKTICK_CLIENT_ID=your_client_id",
+        "  TICKTICK_CLIENT_SECRET=your_client_secret",
+        "  TICKTICK_REDIRECT_URI=your_redirect_uri",
+        "  TICKTICK_USERNAME=your_ticktick_email",
+        "  TICKTICK_PASSWORD=your_ticktick_password",
+    ]))
     sys.exit(1) # Exit if .env file is missing
+except OSError as e:
+    logging.error(f"Failed to read {dotenv_path}: {e}. Check file permissions.")
+    sys.exit(1)
 
-# Load the required .env file
-loaded = load_dotenv(override=True, dotenv_path=dotenv_path)
+# Load the required .env file from the content read above
+loaded = load_dotenv(stream=io.StringIO(dotenv_content), override=True)
 if loaded:
     logging.info(f"Successfully loaded environment variables from: {dotenv_path}")
 else:
-    # This case might indicate an issue reading the file even if it exists
+    # This case might indicate an issue with the file content even if it exists
     logging.error(f"Failed to load environment variables from {dotenv_path}. Check file permissions and format.")
     sys.exit(1)
 
@@ -1,32 +1,91 @@
+import asyncio
 import datetime
 import functools
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypedDict
+
+import orjson
 
 from .client import TickTickClientSingleton
 
-TaskObject = Dict[str, Any]
+class TaskDict(TypedDict, total=False):
+    """Shape of a task dict as returned by ticktick-py (static typing only, no runtime cost)."""
+    id: str
+    projectId: str
+    title: str
+    content: str
+    desc: str
+    status: int # 0 = uncompleted, 2 = completed
+    priority: int # 0 = None, 1 = Low, 3 = Medium, 5 = High
+    tags: List[str]
+    startDate: str
+    dueDate: str
+    completedTime: str
+    isAllDay: bool
+    timeZone: str
+    parentId: str
+    items: List[Dict[str, Any]]
+
+def _is_task(obj: Optional[Dict[str, Any]]) -> bool:
+    """Returns True if an object from the client's state looks like a task (it belongs to a project)."""
+    return obj is not None and bool(obj.get('projectId'))
 
 # Define the ToolLogicError exception
 class ToolLogicError(Exception):
     pass
 
+# Errors expected from a tool call and reported back to the agent as {"error": ...}:
+# ticktick-py raises RuntimeError for non-200 API responses, requests/socket failures are
+# OSError subclasses (ConnectionError included), and bad input or unexpected payloads surface
+# as ValueError/TypeError/KeyError. Anything else is a bug and propagates to FastMCP.
+TICKTICK_API_ERRORS = (ToolLogicError, RuntimeError, OSError, ValueError, TypeError, KeyError)
+
+# --- Precomputed Responses --- #
+# Constant payloads are serialized once at import instead of on every call
+NULL_RESPONSE = "null"
+CLIENT_NOT_INITIALIZED_RESPONSE = orjson.dumps(
+    {"error": "TickTick client not initialized. Please check credentials and restart."}
+).decode()
+
 # --- Helper Function --- #
 def format_response(result: Any) -> str:
     """Formats the result from ticktick-py into a JSON string for MCP."""
     if isinstance(result, (dict, list)):
         try:
-            return json.dumps(result, indent=2, default=str)
-        except TypeError as e:
+            # orjson serializes datetimes natively; default=str only covers exotic types
+            # Compact output: agents parse the JSON, indentation only adds bytes
+            return orjson.dumps(result, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError as e: # orjson.JSONEncodeError subclasses TypeError
             logging.error(f"Failed to serialize response object: {e} - Object: {result}", exc_info=True)
             return json.dumps({"error": "Failed to serialize response", "details": str(e)})
     elif result is None:
-         return json.dumps(None)
+         return NULL_RESPONSE
     else:
         logging.warning(f"Formatting unexpected type: {type(result)} - Value: {result}")
         return json.dumps({"result": str(result)})
 
+# --- Helper for Paginated Responses --- #
+def _paginate(items: Sequence[Any], page: int, page_size: int) -> Dict[str, Any]:
+    """Slices one page out of items and describes where the next page starts.
+
+    next_page is None on the last page. Raises ToolLogicError on a negative page or a
+    page_size below 1.
+    """
+    if page < 0 or page_size < 1:
+        raise ToolLogicError("page must be >= 0 and page_size must be >= 1.")
+    start = page * page_size
+    end = start + page_size
+    return {
+        "items": list(items[start:end]),
+        "page": page,
+        "page_size": page_size,
+        "total": len(items),
+        "next_page": page + 1 if end < len(items) else None,
+    }
+
 # --- Decorator for Client Check --- #
 def require_ticktick_client(func):
     """Decorator to check if ticktick_client is initialized before calling the tool."""
@@ -34,57 +93,282 @@ def require_ticktick_client(func):
     async def wrapper(*args, **kwargs):
         # Get the client instance using the singleton's getter method
         ticktick_client = TickTickClientSingleton.get_client()
-        if not ticktick_client:
+        if ticktick_client is None:
             logging.error("TickTick client is not initialized. Cannot execute tool.")
             # Consider how to communicate this back to the MCP framework/user
             # Maybe raise a specific exception or return an error structure
             # For now, returning an error message in a dict format similar to tool outputs
-            return json.dumps({"error": "TickTick client not initialized. Please check credentials and restart."})
+            return CLIENT_NOT_INITIALIZED_RESPONSE
         # If client exists, proceed with the original function call
         # Original function will now get the client via TickTickClientSingleton.get_client() itself
         return await func(*args, **kwargs)
     return wrapper
 
 # --- Internal Helper to Get All Tasks --- #
-def _get_all_tasks_from_ticktick() -> List[TaskObject]:
-    """Internal helper to fetch all *uncompleted* tasks from all projects."""
-    if not TickTickClientSingleton.get_client():
-        logging.error("_get_all_tasks_from_ticktick called when client is not initialized.")
-        raise ConnectionError("TickTick client not initialized.")
+# Maximum number of concurrent per-project requests issued by _get_all_tasks_from_ticktick
+PROJECT_FETCH_CONCURRENCY = 8
 
-    all_tasks = []
-    try:
-        projects_state = TickTickClientSingleton.get_client().state.get('projects', [])
-    except Exception as e:
-        logging.error(f"Error accessing client state for projects: {e}", exc_info=True)
-        projects_state = []
+# --- Internal Helper for Client State Access --- #
+def _state_list(client, key: str) -> Sequence[Dict[str, Any]]:
+    """Returns the client's state collection for key as a list.
+
+    ticktick-py seeds its state with empty dicts until the first sync, so anything that is
+    not a list is normalized to an empty (shared, immutable) sequence here, once, instead of
+    being type-checked by every caller.
+    """
+    collection = client.state.get(key)
+    return collection if isinstance(collection, list) else ()
+
+# (projects state list, its length, inbox_id, project ids) from the last _get_project_ids call
+_project_ids_cache: Optional[Tuple[Any, int, Optional[str], Tuple[str, ...]]] = None
+
+def _get_project_ids(client) -> Tuple[str, ...]:
+    """Returns the inbox ID followed by the IDs of all projects in the client's state, in state order.
 
-    # Get unique project IDs from state, add inbox ID
-    project_ids = {p.get('id') for p in projects_state if p.get('id')}
+    The result is cached until the projects list is replaced (e.g. by a sync), changes
+    length, or the inbox ID changes.
+    """
+    global _project_ids_cache
+    projects_state = _state_list(client, 'projects')
     try:
-        if TickTickClientSingleton.get_client().inbox_id:
-            project_ids.add(TickTickClientSingleton.get_client().inbox_id)
+        inbox_id = client.inbox_id
     except Exception as e:
         logging.error(f"Error accessing client inbox_id: {e}", exc_info=True)
+        inbox_id = None
 
+    cached = _project_ids_cache
+    if cached and cached[0] is projects_state and cached[1] == len(projects_state) and cached[2] == inbox_id:
+        return cached[3]
+
+    # Unique project IDs in a stable order (inbox first, then state order) so aggregated task lists are too
+    project_ids = [inbox_id] if inbox_id else []
+    project_ids.extend(p.get('id') for p in projects_state if p.get('id'))
+    result = tuple(dict.fromkeys(project_ids))
+    _project_ids_cache = (projects_state, len(projects_state), inbox_id, result)
+    return result
+
+async def _get_all_tasks_from_ticktick() -> List[TaskDict]:
+    """Internal helper to fetch all *uncompleted* tasks from all projects.
+
+    Projects are fetched concurrently (bounded by PROJECT_FETCH_CONCURRENCY) in worker
+    threads, since ticktick-py only offers blocking calls, and through the per-project
+    cache. Tasks are returned in project order, and a task returned by more than one
+    project fetch is kept once (first occurrence wins).
+    """
+    client = TickTickClientSingleton.get_client()
+    if client is None:
+        logging.error("_get_all_tasks_from_ticktick called when client is not initialized.")
+        raise ConnectionError("TickTick client not initialized.")
+
+    project_ids = _get_project_ids(client)
     logging.debug(f"Fetching uncompleted tasks from {len(project_ids)} projects...")
-    for project_id in project_ids:
-        try:
-            # get_from_project fetches *uncompleted* tasks for a project
-            tasks_in_project = TickTickClientSingleton.get_client().task.get_from_project(project_id)
-            if tasks_in_project:
-                 if isinstance(tasks_in_project, list):
-                     all_tasks.extend(tasks_in_project)
-                 elif isinstance(tasks_in_project, dict):
-                     all_tasks.append(tasks_in_project)
-                 else:
-                    logging.warning(f"Unexpected data type received from get_from_project for {project_id}: {type(tasks_in_project)}")
-        except Exception as e:
-            logging.warning(f"Failed to get tasks for project {project_id}: {e}")
+    semaphore = asyncio.Semaphore(PROJECT_FETCH_CONCURRENCY)
+
+    async def fetch_project(project_id: str) -> Any:
+        async with semaphore:
+            # get_from_project fetches *uncompleted* tasks for a project; the per-project
+            # cache lets this share fetches with ticktick_get_tasks_from_project
+            return await _get_project_tasks_cached(project_id)
+
+    results = await asyncio.gather(*(fetch_project(pid) for pid in project_ids), return_exceptions=True)
+
+    all_tasks: List[TaskDict] = []
+    seen_ids = set()
+    for project_id, tasks_in_project in zip(project_ids, results):
+        if isinstance(tasks_in_project, Exception):
+            logging.warning(f"Failed to get tasks for project {project_id}: {tasks_in_project}")
+            continue
+        if not tasks_in_project:
+            continue
+        if isinstance(tasks_in_project, dict):
+            tasks_in_project = [tasks_in_project]
+        elif not isinstance(tasks_in_project, list):
+            logging.warning(f"Unexpected data type received from get_from_project for {project_id}: {type(tasks_in_project)}")
+            continue
+        # Validated once here so consumers of the (cached) list can skip per-task type checks
+        for task in tasks_in_project:
+            if not isinstance(task, dict):
+                continue
+            task_id = task.get('id')
+            if task_id is not None:
+                if task_id in seen_ids:
+                    continue
+                seen_ids.add(task_id)
+            all_tasks.append(task)
 
     logging.info(f"Found {len(all_tasks)} total uncompleted tasks.")
     return all_tasks
 
+# --- Cached Access to All Tasks --- #
+# Seconds a fetched list of uncompleted tasks is reused before all projects are fetched again
+TASKS_CACHE_TTL = 10.0
+_tasks_cache: Dict[str, Any] = {"ts": 0.0, "data": None, "indexes": None}
+_tasks_cache_lock = asyncio.Lock()
+# Bumped by every invalidation. A fetch captures it before awaiting and only stores its result
+# if it is unchanged, so a fetch that overlapped a write cannot re-cache pre-write data.
+_tasks_cache_generation = 0
+
+# Task fields indexed on every cache refresh, as {field: {value: [tasks]}}
+TASK_INDEX_KEYS = ('projectId', 'priority')
+# List-valued task fields indexed per element, as {field: {element: [tasks]}}
+TASK_MULTI_INDEX_KEYS = ('tags',)
+TaskIndexes = Dict[str, Dict[Any, List[TaskDict]]]
+
+def _build_task_indexes(tasks: List[TaskDict]) -> TaskIndexes:
+    """Groups tasks by each field in TASK_INDEX_KEYS and TASK_MULTI_INDEX_KEYS in a single pass.
+
+    Tasks are bucketed under task.get(field), so a lookup by value selects exactly the
+    tasks an equality check on that field would accept. For list-valued fields a task is
+    bucketed once under each distinct element, matching a membership check.
+    """
+    indexes: TaskIndexes = {key: {} for key in TASK_INDEX_KEYS + TASK_MULTI_INDEX_KEYS}
+    scalar_indexes = [(key, indexes[key]) for key in TASK_INDEX_KEYS]
+    multi_indexes = [(key, indexes[key]) for key in TASK_MULTI_INDEX_KEYS]
+    for task in tasks:
+        for key, index in scalar_indexes:
+            index.setdefault(task.get(key), []).append(task)
+        for key, index in multi_indexes:
+            for element in dict.fromkeys(task.get(key) or ()):
+                index.setdefault(element, []).append(task)
+    return indexes
+
+async def _get_all_tasks_indexed(ttl: float = TASKS_CACHE_TTL) -> Tuple[List[TaskDict], TaskIndexes]:
+    """Returns all *uncompleted* tasks and their indexes, reusing the last fetch if it is younger than ttl seconds.
+
+    Concurrent callers share a single fetch. The returned list and indexes are shared
+    between callers and must not be mutated.
+    """
+    async with _tasks_cache_lock:
+        if _tasks_cache["data"] is not None and time.monotonic() - _tasks_cache["ts"] < ttl:
+            logging.debug("Serving uncompleted tasks from cache.")
+            return _tasks_cache["data"], _tasks_cache["indexes"]
+        generation = _tasks_cache_generation
+        data = await _get_all_tasks_from_ticktick()
+        indexes = _build_task_indexes(data)
+        if generation == _tasks_cache_generation:
+            _tasks_cache["ts"] = time.monotonic()
+            _tasks_cache["data"] = data
+            _tasks_cache["indexes"] = indexes
+        else:
+            logging.debug("Tasks changed during fetch; result not cached.")
+        return data, indexes
+
+async def _get_all_tasks_cached(ttl: float = TASKS_CACHE_TTL) -> List[TaskDict]:
+    """Returns all *uncompleted* tasks, reusing the last fetch if it is younger than ttl seconds.
+
+    The returned list is shared between callers and must not be mutated.
+    """
+    tasks, _ = await _get_all_tasks_indexed(ttl)
+    return tasks
+
+# project ID -> (fetch time, uncompleted tasks) for single-project reads
+_project_tasks_cache: Dict[str, Tuple[float, List[TaskDict]]] = {}
+
+async def _get_project_tasks_cached(project_id: str, ttl: float = TASKS_CACHE_TTL) -> List[TaskDict]:
+    """Returns a project's *uncompleted* tasks, reusing the last fetch if it is younger than ttl seconds.
+
+    The returned list is shared between callers and must not be mutated.
+    """
+    cached = _project_tasks_cache.get(project_id)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        logging.debug(f"Serving tasks for project {project_id} from cache.")
+        return cached[1]
+    client = TickTickClientSingleton.get_client()
+    generation = _tasks_cache_generation
+    tasks = await asyncio.to_thread(client.task.get_from_project, project_id)
+    # Ensure result is a list even if API returns None or single dict
+    if tasks is None:
+        tasks = []
+    elif isinstance(tasks, dict):
+        tasks = [tasks]
+    if generation == _tasks_cache_generation:
+        _project_tasks_cache[project_id] = (time.monotonic(), tasks)
+    return tasks
+
+def invalidate_tasks_cache() -> None:
+    """Drops the cached task lists and state index so the next read fetches fresh data."""
+    global _state_index_cache, _tasks_cache_generation
+    _tasks_cache_generation += 1
+    _state_index_cache = None
+    # Writes can touch more than one project (e.g. a move), so every project entry goes
+    _project_tasks_cache.clear()
+    _tasks_cache["ts"] = 0.0
+    _tasks_cache["data"] = None
+    _tasks_cache["indexes"] = None
+
+# --- Decorator for Write Tools --- #
+def invalidates_tasks_cache(func):
+    """Decorator for tools that modify tasks: invalidates the cached task list after the call."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            invalidate_tasks_cache()
+    return wrapper
+
+# --- Internal Helper to Index Client State --- #
+def _build_state_index(client) -> Dict[str, Dict[str, Any]]:
+    """Builds an {id: object} index over every collection in the client's local state.
+
+    Mirrors the traversal done by ticktick-py's get_by_id, but walks the state once so
+    that a batch of lookups costs O(state size) instead of O(ids x state size).
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+    for collection in client.state.values():
+        if not isinstance(collection, list):
+            continue
+        for obj in collection:
+            if isinstance(obj, dict) and obj.get('id'):
+                # Keep the first occurrence, matching get_by_id's first-match semantics
+                index.setdefault(obj['id'], obj)
+    return index
+
+# (state collections with their lengths, index) from the last _get_state_index call
+_state_index_cache: Optional[Tuple[Tuple[Tuple[Any, int], ...], Dict[str, Dict[str, Any]]]] = None
+
+def _get_state_index(client) -> Dict[str, Dict[str, Any]]:
+    """Returns _build_state_index(client), reusing the last index while the state is unchanged.
+
+    The index is rebuilt when a state collection is replaced (e.g. by a sync) or changes
+    length, and after every write tool (see invalidate_tasks_cache). The returned dict is
+    shared and must not be mutated.
+    """
+    global _state_index_cache
+    signature = tuple(
+        (collection, len(collection)) for collection in client.state.values() if isinstance(collection, list)
+    )
+    cached = _state_index_cache
+    if cached and len(cached[0]) == len(signature) and all(
+        old is new and old_len == new_len for (old, old_len), (new, new_len) in zip(cached[0], signature)
+    ):
+        return cached[1]
+    index = _build_state_index(client)
+    _state_index_cache = (signature, index)
+    return index
+
+# --- Helper for ISO Datetime Parsing --- #
+# Shape check for the extended ISO 8601 forms agents send (date, optional time and offset).
+# Lets tools reject malformed input up front without going through fromisoformat's ValueError.
+_ISO_DATETIME_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}'
+    r'(?:[T ]\d{2}(?::\d{2}(?::\d{2}(?:[.,]\d+)?)?)?(?:Z|[+-]\d{2}(?::?\d{2}(?::?\d{2}(?:\.\d+)?)?)?)?)?'
+)
+
+def _is_iso_datetime(value: Optional[str]) -> bool:
+    """Returns True if value has the shape of an ISO 8601 date or datetime string."""
+    return bool(value) and _ISO_DATETIME_RE.fullmatch(value) is not None
+
+@functools.lru_cache(maxsize=256)
+def _parse_iso_datetime(value: str) -> datetime.datetime:
+    """Parses an ISO 8601 string into a datetime, memoizing results (datetimes are immutable).
+
+    A trailing 'Z' is accepted on all supported Python versions. Raises ValueError on bad input.
+    """
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.datetime.fromisoformat(value)
+
 # --- Helper for Due Date Parsing --- #
 def _parse_due_date(due_date_str: Optional[str]) -> Optional[datetime.date]:
     """Parses TickTick's dueDate string (e.g., '2024-07-27T...') into a date object."""
@@ -100,4 +384,4 @@ def _parse_due_date(due_date_str: Optional[str]) -> Optional[datetime.date]:
             return None
     except (ValueError, TypeError) as e:
         logging.warning(f"Could not parse dueDate string '{due_date_str}': {e}")
-        return None 
\ No newline at end of file
+        return None
@@ -1,11 +1,10 @@
-import datetime
 import logging
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 # Import the shared MCP instance for the decorator
 from ..mcp_instance import mcp
 # Import helpers
-from ..helpers import format_response, require_ticktick_client
+from ..helpers import format_response, _is_iso_datetime, _parse_iso_datetime, TICKTICK_API_ERRORS
 # Import the specific conversion function from the library
 from ticktick.helpers.time_methods import convert_date_to_tick_tick_format
 
@@ -14,7 +13,7 @@ from ticktick.helpers.time_methods import convert_date_to_tick_tick_format
 # ================== #
 
 @mcp.tool()
-@require_ticktick_client
+# No @require_ticktick_client: the conversion is local and works without a TickTick session
 async def ticktick_convert_datetime_to_ticktick_format(datetime_iso_string: str, tz: str) -> str:
     """
     [Helper Tool] Converts ISO 8601 date/time string to TickTick API format.
@@ -49,14 +48,16 @@ async def ticktick_convert_datetime_to_ticktick_format(datetime_iso_string: str,
         }
         (Result might be: {"formatted_datetime": "2024-07-26T18:00:00.000+0200"})
     """
+    if not _is_iso_datetime(datetime_iso_string):
+        return format_response({"error": f"Invalid datetime format: '{datetime_iso_string}'. Use ISO format.", "status": "error"})
     try:
-        dt_obj = datetime.datetime.fromisoformat(datetime_iso_string)
+        dt_obj = _parse_iso_datetime(datetime_iso_string)
         ticktick_format = convert_date_to_tick_tick_format(dt_obj, tz)
         return format_response({"ticktick_format": ticktick_format})
     except ValueError as e:
         # Handle specific parsing/timezone errors
         logging.warning(f"Invalid datetime format or timezone for conversion: {e} (Input: '{datetime_iso_string}', TZ: '{tz}')")
         return format_response({"error": f"Invalid datetime format or timezone: {e}. Use ISO format and valid TZ name.", "status": "error"})
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Conversion failed for '{datetime_iso_string}' (TZ: '{tz}'): {e}", exc_info=True)
         return format_response({"error": f"Conversion failed: {e}", "status": "error"}) 
\ No newline at end of file
@@ -1,7 +1,9 @@
+import asyncio
 import datetime
-import json
+import functools
+import heapq
 import logging
-from typing import Optional, List, Dict, Any, Union, Literal, Tuple
+from typing import Callable, Optional, List, Dict, Any, Literal, Sequence, Tuple
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from pydantic import BaseModel, Field, validator
 
@@ -12,13 +14,12 @@ from ..client import TickTickClientSingleton
 # Import helpers
 from ..helpers import (
     format_response, require_ticktick_client,
-    _get_all_tasks_from_ticktick
+    _get_all_tasks_indexed, _paginate, TaskDict, TICKTICK_API_ERRORS
 )
 
 # Type Hints (can be shared or moved)
 TagLabel = str
 TaskStatus = Literal['uncompleted', 'completed']
-TaskDict = Dict[str, Any]
 
 class PeriodFilter(BaseModel):
     start_date: Optional[datetime.datetime] = Field(None, description="Start date/time for filtering period")
@@ -70,33 +71,22 @@ class PeriodFilter(BaseModel):
         compare_start_date = self.start_date.date() if self.start_date else None
         compare_end_date = self.end_date.date() if self.end_date else None
 
-        logging.info(f"Comparing task date {compare_task_date} with start date {compare_start_date} and end date {compare_end_date}")
+        # Runs once per task: only build the message when debug logging is actually on
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(f"Comparing task date {compare_task_date} with start date {compare_start_date} and end date {compare_end_date}")
         if compare_start_date and compare_task_date < compare_start_date:
             return False
 
-        logging.info(f"Comparing task date {compare_task_date} with end date {compare_end_date}")
         if compare_end_date and compare_task_date > compare_end_date:
             return False
 
         return True
 
     def _parse_task_date(self, date_str: str) -> Optional[datetime.datetime]:
+        dt = _parse_task_date_str(date_str)
+        if dt is None:
+            return None
         try:
-            if 'T' in date_str:
-                 try:
-                      if date_str.endswith('Z'):
-                          date_str = date_str[:-1] + '+00:00'
-                      dt = datetime.datetime.fromisoformat(date_str.replace(".000", ""))
-                 except ValueError:
-                      logging.warning(f"Could not parse task date '{date_str}' with fromisoformat, trying without offset.")
-                      # Try parsing without timezone if fromisoformat fails with it
-                      dt_str_no_offset = date_str.split('+')[0].split('Z')[0].replace(".000", "")
-                      dt = datetime.datetime.fromisoformat(dt_str_no_offset)
-
-            else:
-                date_only = datetime.date.fromisoformat(date_str)
-                dt = datetime.datetime.combine(date_only, datetime.time.min)
-
             # Apply filter's timezone if task date is naive
             if self.tz and dt.tzinfo is None:
                  dt = self.tz.localize(dt)
@@ -112,6 +102,31 @@ class PeriodFilter(BaseModel):
             logging.warning(f"Failed to parse task date string '{date_str}': {e}")
             return None
 
+@functools.lru_cache(maxsize=4096)
+def _parse_task_date_str(date_str: str) -> Optional[datetime.datetime]:
+    """Parses a task date string from TickTick, before any filter timezone is applied.
+
+    The same dates are parsed on every filter call over the cached task list, so results
+    are memoized (datetimes are immutable). Returns None if the string cannot be parsed.
+    """
+    try:
+        if 'T' in date_str:
+             try:
+                  if date_str.endswith('Z'):
+                      date_str = date_str[:-1] + '+00:00'
+                  return datetime.datetime.fromisoformat(date_str.replace(".000", ""))
+             except ValueError:
+                  logging.warning(f"Could not parse task date '{date_str}' with fromisoformat, trying without offset.")
+                  # Try parsing without timezone if fromisoformat fails with it
+                  dt_str_no_offset = date_str.split('+')[0].split('Z')[0].replace(".000", "")
+                  return datetime.datetime.fromisoformat(dt_str_no_offset)
+
+        date_only = datetime.date.fromisoformat(date_str)
+        return datetime.datetime.combine(date_only, datetime.time.min)
+    except Exception as e:
+        logging.warning(f"Failed to parse task date string '{date_str}': {e}")
+        return None
+
 class PropertyFilter(BaseModel):
     """Defines the criteria for filtering TickTick tasks.
 
@@ -132,34 +147,70 @@ class PropertyFilter(BaseModel):
 
 
     def matches(self, task: TaskDict) -> bool:
-        task_tags = task.get('tags', [])
-        if self.tag_label and self.tag_label not in task_tags:
-            return False
-        if self.project_id and task.get('projectId') != self.project_id:
-            return False
-        if self.priority is not None and task.get('priority') != self.priority:
-            return False
+        return self.build_predicate()(task)
 
-        # Check status match AFTER property checks
-        task_status_value = task.get('status', 0) # 0=uncompleted, 2=completed in TickTick API
-        task_is_completed = task_status_value == 2
-        filter_wants_completed = self.status == 'completed'
+    def scalar_criteria(self) -> Tuple[Tuple[str, Any], ...]:
+        """Returns the set equality criteria as (task key, expected value) pairs."""
+        return tuple(
+            (key, value) for key, value in (('projectId', self.project_id or None), ('priority', self.priority))
+            if value is not None
+        )
 
-        if filter_wants_completed != task_is_completed:
-             # If the basic status doesn't match, no need to check dates
-             return False
+    def index_criteria(self) -> Tuple[Tuple[str, Any], ...]:
+        """Returns the set criteria that a task index can answer, as (task key, value) pairs."""
+        if self.tag_label:
+            return self.scalar_criteria() + (('tags', self.tag_label),)
+        return self.scalar_criteria()
+
+    def build_predicate(self) -> Callable[[TaskDict], bool]:
+        """Compiles the filter into a single predicate to run once per task.
+
+        Criteria that are not set are dropped up front and the remaining values are bound
+        as closure locals, so the per-task work only covers what the filter constrains.
+        """
+        tag_label = self.tag_label or None
+        # Equality criteria split into a key tuple and a value tuple, so each task is checked by
+        # comparing its projection onto the keys against the expected values in one step
+        scalar_items = self.scalar_criteria()
+        scalar_keys = tuple(key for key, _ in scalar_items)
+        scalar_values = tuple(value for _, value in scalar_items)
+        wants_completed = self.status == 'completed'
+        # Only the date filter matching the requested status applies
+        if wants_completed:
+            date_filter, date_key = self.completion_date_filter, "completedTime"
+        else:
+            date_filter, date_key = self.due_date_filter, "dueDate"
+
+        # Checks run cheapest first: scalar equality, tag membership (a scan of the task's
+        # tag list), status, and finally the date filter, which parses and converts a date
+        def predicate(task: TaskDict) -> bool:
+            if scalar_keys and tuple(map(task.get, scalar_keys)) != scalar_values:
+                return False
+            if tag_label is not None and tag_label not in (task.get('tags') or ()):
+                return False
 
-        # Now check date filters based on the *matched* status
-        if not task_is_completed and self.due_date_filter: # Uncompleted task, check due date
-            task_due_date = task.get("dueDate")
-            if not self.due_date_filter.contains(task_due_date):
+            # Check status match AFTER property checks
+            # 0=uncompleted, 2=completed in TickTick API
+            if (task.get('status', 0) == 2) != wants_completed:
+                # If the basic status doesn't match, no need to check dates
                 return False
-        elif task_is_completed and self.completion_date_filter: # Completed task, check completion date
-            if not self.completion_date_filter.contains(task.get("completedTime")):
+
+            # Now check the date filter for the *matched* status
+            if date_filter and not date_filter.contains(task.get(date_key)):
                 return False
 
-        # All relevant checks passed
-        return True
+            # All relevant checks passed
+            return True
+
+        return predicate
+
+def _task_priority(task: TaskDict) -> int:
+    """Sort key for priority ordering; tasks without a priority sort as 0 (None)."""
+    return task.get('priority', 0)
+
+def _task_id(task: TaskDict) -> str:
+    """Sort key giving filter results a deterministic order, so limits and pages are stable."""
+    return str(task.get('id', ''))
 
 class TaskFilterer:
     """Encapsulates logic for filtering TickTick tasks based on various criteria."""
@@ -168,9 +219,14 @@ class TaskFilterer:
         self,
         status: TaskStatus,
         completion_date_filter: Optional[PeriodFilter], # Pass the filter object
-        tz_info: Optional[ZoneInfo] # Use ZoneInfo object
+        tz_info: Optional[ZoneInfo], # Use ZoneInfo object
+        index_criteria: Sequence[Tuple[str, Any]] = () # Equality criteria usable to narrow uncompleted tasks
     ) -> List[TaskDict]:
-        """Fetches tasks based on status and completion date filters."""
+        """Fetches tasks based on status and completion date filters.
+
+        For uncompleted tasks, index_criteria on indexed fields narrow the result to the
+        smallest matching index bucket. The caller still applies the full filter.
+        """
 
         if status == 'completed':
             if not completion_date_filter or (not completion_date_filter.start_date and not completion_date_filter.end_date):
@@ -204,7 +260,8 @@ class TaskFilterer:
                 if not client:
                     raise ConnectionError("TickTick client is not available.")
 
-                tasks = await client.task.get_completed(
+                tasks = await asyncio.to_thread(
+                    client.task.get_completed,
                     from_date=start_dt, # Use datetime object
                     to_date=end_dt,     # Use datetime object
                     # Removed tz argument as client handles it
@@ -228,15 +285,20 @@ class TaskFilterer:
 
         else: # status == 'uncompleted'
             # Fetch all uncompleted tasks; filtering happens later
-            tasks = _get_all_tasks_from_ticktick()
+            tasks, indexes = await _get_all_tasks_indexed()
             logging.debug(f"Retrieved {len(tasks)} uncompleted tasks")
+            buckets = [indexes[key].get(value, []) for key, value in index_criteria if key in indexes]
+            if buckets:
+                tasks = min(buckets, key=len)
+                logging.debug(f"Narrowed to {len(tasks)} candidate tasks using task indexes")
             return tasks
 
     async def filter(
         self,
         property_filter: PropertyFilter, # Pass the unified filter object
         sort_by_priority: bool,
-        tz_info: Optional[ZoneInfo] # Pass ZoneInfo
+        tz_info: Optional[ZoneInfo], # Pass ZoneInfo
+        limit: Optional[int] = None # Maximum number of tasks to return
     ) -> List[TaskDict]:
         """Orchestrates the task filtering process using PropertyFilter."""
 
@@ -247,23 +309,30 @@ class TaskFilterer:
         tasks = await self._fetch_tasks_by_status(
             status=property_filter.status,
             completion_date_filter=completion_filter,
-            tz_info=tz_info # Pass ZoneInfo
+            tz_info=tz_info, # Pass ZoneInfo
+            index_criteria=property_filter.index_criteria()
         )
 
         # 2. Filter Tasks using the comprehensive property_filter
         logging.info(f"{property_filter.status} tasks:")
         logging.info(f"Filtering {len(tasks)} fetched tasks with property filter: {property_filter}")
-        filtered_tasks = [t for t in tasks if property_filter.matches(t)]
+        predicate = property_filter.build_predicate()
+        filtered_tasks = [t for t in tasks if predicate(t)]
         logging.info(f"Filtered {len(tasks)} fetched tasks down to {len(filtered_tasks)} matching criteria.")
 
 
-        # 3. Sort Results (if requested)
+        # 3. Sort Results (by id, then by priority if requested; both sorts are stable) and apply the limit
+        filtered_tasks.sort(key=_task_id)
         if sort_by_priority:
-            filtered_tasks.sort(
-                key=lambda t: t.get('priority', 0), # Sort 0 (None) lowest
-                reverse=True # High priority first
-            )
+            if limit is not None and limit < len(filtered_tasks):
+                # Only the top `limit` tasks are kept: a bounded heap instead of a full sort.
+                # Same result and tie order as sorting descending and slicing.
+                filtered_tasks = heapq.nlargest(limit, filtered_tasks, key=_task_priority)
+            else:
+                filtered_tasks.sort(key=_task_priority, reverse=True) # High priority first
             logging.debug("Sorted tasks by priority (descending).")
+        elif limit is not None:
+            filtered_tasks = filtered_tasks[:limit]
 
 
         return filtered_tasks
@@ -272,23 +341,12 @@ class TaskFilterer:
 # --- Helper Function to Build Filter --- #
 
 def _build_property_filter(
-    filter_criteria: Union[str, Dict[str, Any]]
-) -> Tuple[PropertyFilter, Optional[ZoneInfo], bool]:
-    """Constructs PeriodFilter, PropertyFilter objects, and extracts sort flag from raw filter criteria."""
-    criteria: Dict[str, Any] = {}
-
-    # Parse filter_criteria if it's a string
-    if isinstance(filter_criteria, str):
-        try:
-            criteria = json.loads(filter_criteria)
-        except json.JSONDecodeError as e:
-            logging.error(f"Invalid JSON string provided for filter_criteria: {e}")
-            # Re-raise as ValueError to be caught by the main tool function
-            raise ValueError(f"Invalid JSON string provided: {e}") from e
-    elif isinstance(filter_criteria, dict):
-        criteria = filter_criteria
-    else:
-        raise ValueError("filter_criteria must be a JSON string or a dictionary")
+    criteria: Dict[str, Any]
+) -> Tuple[PropertyFilter, Optional[ZoneInfo], bool, Optional[int], int, Optional[int]]:
+    """Constructs PeriodFilter, PropertyFilter objects, and extracts sort flag, limit and paging from raw filter criteria."""
+    # The tool schema already delivers a parsed dict; no JSON decoding is needed here
+    if not isinstance(criteria, dict):
+        raise ValueError("filter_criteria must be a dictionary")
 
     # Extract parameters from the criteria dictionary
     status = criteria.get("status", "uncompleted")
@@ -300,12 +358,25 @@ def _build_property_filter(
     completion_start_date = criteria.get("completion_start_date")
     completion_end_date = criteria.get("completion_end_date")
     sort_by_priority = criteria.get("sort_by_priority", False)
+    limit = criteria.get("limit")
+    page = criteria.get("page", 0)
+    page_size = criteria.get("page_size")
     tz = criteria.get("tz")
 
     # Validate status type
     if status not in ["uncompleted", "completed"]:
         raise ValueError("Invalid status value. Must be 'uncompleted' or 'completed'.")
 
+    # Validate limit
+    if limit is not None and (type(limit) is not int or limit < 1):
+        raise ValueError("Invalid limit value. Must be a positive integer.")
+
+    # Validate paging
+    if type(page) is not int or page < 0:
+        raise ValueError("Invalid page value. Must be a non-negative integer.")
+    if page_size is not None and (type(page_size) is not int or page_size < 1):
+        raise ValueError("Invalid page_size value. Must be a positive integer.")
+
     # Build ZoneInfo
     tz_info: Optional[ZoneInfo] = None
     if tz:
@@ -338,7 +409,7 @@ def _build_property_filter(
         completion_date_filter=completion_filter,
     )
 
-    return property_filter, tz_info, sort_by_priority
+    return property_filter, tz_info, sort_by_priority, limit, page, page_size
 
 
 # ================================= #
@@ -365,11 +436,21 @@ async def ticktick_filter_tasks(
             - completion_start_date (str, optional): ISO format start date/time for completion date filter (requires status='completed').
             - completion_end_date (str, optional): ISO format end date/time for completion date filter (requires status='completed').
             - sort_by_priority (bool, optional): Sort results by priority (descending). Defaults to False.
+            - limit (int, optional): Maximum number of tasks to return. With sort_by_priority, the highest-priority tasks are kept.
+            - page (int, optional): Zero-based page to return when page_size is set. Defaults to 0.
+            - page_size (int, optional): Maximum number of tasks per page. If omitted, all matches are returned at once.
             - tz (str, optional): Timezone name (e.g., 'America/New_York') for date interpretation.
 
     Returns:
         A JSON string with one of the following structures:
         - Success: A list of task objects matching the filter criteria (may be empty)
+        - Paginated success (page_size set): {
+            "items": list of matching tasks on this page,
+            "page": current page,
+            "page_size": page size,
+            "total": total number of matching tasks,
+            "next_page": page to request next, or null on the last page
+          }
         - Error: {"error": "Error message describing what went wrong", "status": "error"}
 
     Limitations:
@@ -457,23 +538,26 @@ async def ticktick_filter_tasks(
 
     try:
         # Build the filter objects and get sort flag using the helper function
-        property_filter, tz_info, sort_by_priority = _build_property_filter(filter_criteria)
+        property_filter, tz_info, sort_by_priority, limit, page, page_size = _build_property_filter(filter_criteria)
 
         # Execute the filter
         result = await filterer.filter(
             property_filter=property_filter,
             sort_by_priority=sort_by_priority, # Use value from helper
-            tz_info=tz_info
+            tz_info=tz_info,
+            limit=limit
         )
 
-        # Format success response
+        # Format success response, one page of it if requested
+        if page_size is not None:
+            return format_response(_paginate(result, page, page_size))
         return format_response(result)
 
     except (ConnectionError, ValueError) as e: # Catch errors from filterer/fetch/parsing
         logging.error(f"Error during filter_tasks execution: {e}", exc_info=True)
         return format_response({"error": str(e), "status": "error"})
-    except Exception as e:
-        # Detailed error logging for unexpected issues
+    except TICKTICK_API_ERRORS as e:
+        # Detailed error logging for other API/input failures
         logging.error(
             f"Unexpected error in ticktick_filter_tasks tool: filter_criteria={filter_criteria}: {e}",
             exc_info=True
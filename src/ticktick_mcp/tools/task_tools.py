@@ -1,6 +1,7 @@
+import asyncio
 import datetime
 import logging
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, GetCoreSchemaHandler, field_serializer, model_validator
 from ticktick.helpers.time_methods import convert_date_to_tick_tick_format
 from tzlocal import get_localzone
@@ -10,7 +11,7 @@ from ..mcp_instance import mcp
 # Import the singleton class
 from ..client import TickTickClientSingleton
 # Import helpers
-from ..helpers import format_response, require_ticktick_client, _get_all_tasks_from_ticktick, ToolLogicError
+from ..helpers import format_response, require_ticktick_client, invalidates_tasks_cache, invalidate_tasks_cache, _paginate, _get_project_ids, _get_all_tasks_cached, _get_project_tasks_cached, _get_state_index, _state_list, _is_task, _is_iso_datetime, _parse_iso_datetime, TICKTICK_API_ERRORS
 
 # Type Hints (can be shared or moved)
 TaskId = str
@@ -95,6 +96,7 @@ class TaskObject(BaseModel):
 
 @mcp.tool()
 @require_ticktick_client
+@invalidates_tasks_cache
 async def ticktick_create_task(
     title: str,
     projectId: Optional[str] = None,
@@ -196,9 +198,12 @@ async def ticktick_create_task(
     logging.info(f"Attempting to create task with title: '{title}'")
     try:
         client = TickTickClientSingleton.get_client()
+        for field_name, value in (("startDate", startDate), ("dueDate", dueDate)):
+            if value and not _is_iso_datetime(value):
+                return format_response({"error": f"Invalid date format for {field_name}: '{value}'. Use ISO format."})
         try:
-            start_dt = datetime.datetime.fromisoformat(startDate) if startDate else None
-            due_dt = datetime.datetime.fromisoformat(dueDate) if dueDate else None
+            start_dt = _parse_iso_datetime(startDate) if startDate else None
+            due_dt = _parse_iso_datetime(dueDate) if dueDate else None
         except ValueError as e:
              return format_response({"error": f"Invalid date format for startDate or dueDate: {e}. Use ISO format."})
 
@@ -218,15 +223,16 @@ async def ticktick_create_task(
             sortOrder=sortOrder,
             items=items
         )
-        created_task = client.task.create(task_dict)
+        created_task = await asyncio.to_thread(client.task.create, task_dict)
         logging.info(f"Successfully created task: {created_task.get('id')}")
         return format_response(created_task)
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to create task '{title}': {e}", exc_info=True)
         return format_response({"error": f"Failed to create task: {e}"})
 
 @mcp.tool(name="ticktick_update_task") # Explicitly name tool to avoid conflict if class is renamed
 @require_ticktick_client
+@invalidates_tasks_cache
 async def update_task(
     task_object: TaskObject # Use the Pydantic model for validation
 ) -> str:
@@ -310,24 +316,109 @@ async def update_task(
     try:
         client = TickTickClientSingleton.get_client()
         task_obj = client.get_by_id(task_id)
+        if not task_obj:
+            return format_response({"error": f"Task with ID {task_id} not found or invalid.", "status": "not_found"})
         task_obj.update(task_object)
 
-        updated_task = client.task.update(task_object.model_dump(mode='json'))
+        updated_task = await asyncio.to_thread(client.task.update, task_object.model_dump(mode='json'))
         logging.info(f"Successfully updated task ID: {task_id}")
         return format_response(updated_task)
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to update task {task_id}: {e}", exc_info=True)
         return format_response({"error": f"Failed to update task {task_id}: {e}"})
 
+def _is_deletable_task(obj: Optional[Dict[str, Any]]) -> bool:
+    """Returns True if obj looks like a task object that can be deleted (has projectId and title)."""
+    return _is_task(obj) and obj.get('title') is not None
+
+def _deletion_response(tasks_to_delete: List[Dict[str, Any]], deleted_result: Any, warning_message: str = "") -> str:
+    """Builds the success response shared by the task deletion tools."""
+    response_data = {
+        "status": "success",
+        "deleted_count": len(tasks_to_delete),
+        "api_response": deleted_result,
+        "tasks_deleted_ids": [t['id'] for t in tasks_to_delete]
+    }
+    if warning_message:
+        response_data["warnings"] = warning_message.strip()
+    return format_response(response_data)
+
 @mcp.tool()
 @require_ticktick_client
-async def ticktick_delete_tasks(task_ids: Union[str, List[str]]) -> str:
+@invalidates_tasks_cache
+async def ticktick_delete_task(task_id: str) -> str:
     """
-    Deletes one or more tasks using their IDs.
+    Deletes a single task using its ID.
 
     Args:
-        task_ids (Union[str, List[str]]): A single task ID string or a list of task ID strings.
-                                         Required. Each ID must be a valid TickTick task ID.
+        task_id (str): The ID string of the task to delete. Required.
+                      Must be a valid TickTick task ID.
+
+    Returns:
+        A JSON string with one of the following structures:
+        - Success: {
+            "status": "success",
+            "deleted_count": 1,
+            "tasks_deleted_ids": [the deleted task ID],
+            "api_response": original API response
+          }
+        - Not Found: {"message": "No valid tasks found for the provided ID(s) to delete.", "status": "not_found", ...}
+        - Error: {"error": "Error message", "status": "error"}
+
+    Limitations:
+        - Deleted tasks cannot be recovered through the API
+        - Deleting a parent task will also delete all of its subtasks
+        - Requires the user to have delete permissions for the specified task
+        - To delete several tasks at once, use ticktick_delete_tasks
+
+    Examples:
+        Delete a single task:
+        {
+            "task_id": "task_id_to_delete_123"
+        }
+
+    Agent Usage Guide:
+        - Use this tool when users request to "delete/remove a task"
+        - Example mapping:
+          "Delete my grocery shopping task" →
+          First find the task ID using ticktick_filter_tasks with appropriate criteria
+          Then: {"task_id": "[found task ID]"}
+    """
+    # ticktick-py delete expects the task *object*, not just the ID. We need to fetch it first.
+    try:
+        client = TickTickClientSingleton.get_client()
+        # Same lookup as the batch tool: a miss is None here (get_by_id would return {})
+        task_obj = _get_state_index(client).get(task_id)
+        if not _is_deletable_task(task_obj):
+            if task_obj is not None:
+                logging.warning(f"Object found for ID {task_id} but it does not appear to be a valid task object: {task_obj}")
+            return format_response({
+                "message": "No valid tasks found for the provided ID(s) to delete.",
+                "status": "not_found",
+                "missing_ids": [task_id] if task_obj is None else [],
+                "invalid_ids": [task_id] if task_obj is not None else []
+            })
+
+        deleted_result = await asyncio.to_thread(client.task.delete, task_obj)
+        return _deletion_response([task_obj], deleted_result)
+
+    except ConnectionError as ce:
+        logging.error(f"ConnectionError during task deletion for {task_id}: {ce}", exc_info=True)
+        return format_response({"error": str(ce), "status": "error"})
+    except TICKTICK_API_ERRORS as e:
+        logging.error(f"Exception during task deletion for {task_id}: {e}", exc_info=True)
+        return format_response({"error": f"Failed to delete task {task_id}: {e}", "status": "error"})
+
+@mcp.tool()
+@require_ticktick_client
+@invalidates_tasks_cache
+async def ticktick_delete_tasks(task_ids: List[str]) -> str:
+    """
+    Deletes multiple tasks using their IDs in a single batch request.
+
+    Args:
+        task_ids (List[str]): A list of task ID strings. Required.
+                             Each ID must be a valid TickTick task ID.
 
     Returns:
         A JSON string with one of the following structures:
@@ -345,40 +436,37 @@ async def ticktick_delete_tasks(task_ids: Union[str, List[str]]) -> str:
         - Deleting a parent task will also delete all of its subtasks
         - Task IDs must be valid; invalid IDs will be reported in the warning message
         - Requires the user to have delete permissions for the specified tasks
+        - To delete a single task, use ticktick_delete_task
 
     Examples:
-        Delete a single task:
-        {
-            "task_ids": "task_id_to_delete_123"
-        }
-
         Delete multiple tasks:
         {
             "task_ids": ["task_id_abc", "task_id_def", "task_id_ghi"]
         }
 
     Agent Usage Guide:
-        - Use this tool when users request to "delete/remove/clear a task or tasks"
+        - Use this tool when users request to "delete/remove/clear" several tasks
         - Always confirm with the user before deleting multiple tasks
         - If some IDs can't be found, explain to the user which tasks couldn't be deleted
         - Example mapping:
-          "Delete my grocery shopping task" →
-          First find the task ID using ticktick_filter_tasks with appropriate criteria
-          Then: {"task_ids": "[found task ID]"}
+          "Delete all my completed shopping items" →
+          First find the task IDs using ticktick_filter_tasks with appropriate criteria
+          Then: {"task_ids": ["[found task ID 1]", "[found task ID 2]"]}
     """
     tasks_to_delete = []
-    ids_to_process = task_ids if isinstance(task_ids, list) else [task_ids]
+    # Drop repeated IDs (order-preserving) so each task is looked up and deleted once
+    ids_to_process = list(dict.fromkeys(task_ids))
 
     # ticktick-py delete expects task *objects*, not just IDs. We need to fetch them first.
     try:
         client = TickTickClientSingleton.get_client()
         missing_ids = []
         invalid_ids = [] # Track IDs that returned an object but wasn't a task
+        # Index the local state once instead of calling get_by_id (a linear scan) per ID
+        state_index = _get_state_index(client)
         for tid in ids_to_process:
-            # Using the client's generic get_by_id
-            obj = client.get_by_id(tid)
-            # Check if it looks like a task object (has projectId and title)
-            if obj and isinstance(obj, dict) and obj.get('projectId') and obj.get('title') is not None:
+            obj = state_index.get(tid)
+            if _is_deletable_task(obj):
                 tasks_to_delete.append(obj)
             else:
                 if obj is None:
@@ -407,25 +495,14 @@ async def ticktick_delete_tasks(task_ids: Union[str, List[str]]) -> str:
                      "invalid_ids": invalid_ids
                  })
 
-        input_is_single = isinstance(task_ids, str)
-        delete_input = tasks_to_delete[0] if input_is_single else tasks_to_delete
-
-        deleted_result = client.task.delete(delete_input)
-
-        response_data = {
-            "status": "success",
-            "deleted_count": len(tasks_to_delete),
-            "api_response": deleted_result,
-            "tasks_deleted_ids": [t['id'] for t in tasks_to_delete]
-        }
-        if warning_message:
-            response_data["warnings"] = warning_message.strip()
-        return format_response(response_data)
+        # A list is sent to the API as one batch request
+        deleted_result = await asyncio.to_thread(client.task.delete, tasks_to_delete)
+        return _deletion_response(tasks_to_delete, deleted_result, warning_message)
 
     except ConnectionError as ce:
         logging.error(f"ConnectionError during task deletion for {task_ids}: {ce}", exc_info=True)
         return format_response({"error": str(ce), "status": "error"})
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Exception during task deletion for {task_ids}: {e}", exc_info=True)
         return format_response({"error": f"Failed to delete tasks {task_ids}: {e}", "status": "error"})
 
@@ -468,20 +545,15 @@ async def ticktick_get_tasks_from_project(project_id: str) -> str:
     """
 
     try:
-        client = TickTickClientSingleton.get_client()
-        tasks = client.task.get_from_project(project_id)
-        # Ensure result is a list even if API returns None or single dict
-        if tasks is None:
-             tasks = []
-        elif isinstance(tasks, dict):
-             tasks = [tasks]
+        tasks = await _get_project_tasks_cached(project_id)
         return format_response(tasks)
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to get tasks from project {project_id}: {e}", exc_info=True)
         return format_response({"error": f"Failed to get tasks from project {project_id}: {e}"})
 
 @mcp.tool()
 @require_ticktick_client
+@invalidates_tasks_cache
 async def ticktick_complete_task(task_id: str) -> str:
     """
     Marks a specific task as complete using its ID.
@@ -522,24 +594,26 @@ async def ticktick_complete_task(task_id: str) -> str:
         client = TickTickClientSingleton.get_client()
 
         task_obj = client.get_by_id(task_id)
-        if not task_obj or not isinstance(task_obj, dict) or not task_obj.get('projectId'):
+        if not _is_task(task_obj):
             return format_response({"error": f"Task with ID {task_id} not found or invalid.", "status": "not_found"})
 
-        completed_task_result = client.task.complete(task_obj)
+        completed_task_result = await asyncio.to_thread(client.task.complete, task_obj)
 
-        updated_task_obj = client.get_by_id(task_id)
-        if updated_task_obj and isinstance(updated_task_obj, dict) and updated_task_obj.get('status', 0) != 0:
-             return format_response(updated_task_obj)
+        # Reflect the new status locally instead of re-fetching the task. The library's result is
+        # only trusted if it is this task; the client's state object is copied, not mutated.
+        if isinstance(completed_task_result, dict) and completed_task_result.get('id') == task_id:
+            completed_task = completed_task_result
         else:
-             logging.warning(f"Completed task {task_id}, but refetch failed or status unchanged. Result: {updated_task_obj}")
-             return format_response(completed_task_result if completed_task_result else {"warning": "Completion API call succeeded but task status verification failed.", "task_id": task_id})
+            completed_task = task_obj
+        return format_response({**completed_task, 'status': 2}) # 2 = completed in TickTick API
 
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to complete task {task_id}: {e}", exc_info=True)
         return format_response({"error": f"Failed to complete task {task_id}: {e}"})
 
 @mcp.tool()
 @require_ticktick_client
+@invalidates_tasks_cache
 async def ticktick_move_task(task_id: str, new_project_id: str) -> str:
     """
     Moves a specific task to a different project.
@@ -587,7 +661,7 @@ async def ticktick_move_task(task_id: str, new_project_id: str) -> str:
         client = TickTickClientSingleton.get_client()
 
         task_obj = client.get_by_id(task_id)
-        if not task_obj.get('projectId'):
+        if not _is_task(task_obj):
             return format_response({"error": f"Task with ID {task_id} not found or invalid.", "status": "not_found"})
 
         # Check if the target project exists? (Optional, API might handle it)
@@ -597,15 +671,16 @@ async def ticktick_move_task(task_id: str, new_project_id: str) -> str:
             # Allow the move attempt anyway, the API might handle this case.
             # return format_response({"error": f"Target project with ID {new_project_id} not found or invalid.", "status": "not_found"})
 
-        moved_task = client.task.move(task_obj, new_project_id)
+        moved_task = await asyncio.to_thread(client.task.move, task_obj, new_project_id)
         # Fetch again to confirm project ID change? API response might be sufficient.
         return format_response(moved_task)
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to move task {task_id} to project {new_project_id}: {e}", exc_info=True)
         return format_response({"error": f"Failed to move task {task_id} to project {new_project_id}: {e}"})
 
 @mcp.tool()
 @require_ticktick_client
+@invalidates_tasks_cache
 async def ticktick_make_subtask(parent_task_id: str, child_task_id: str) -> str:
     """
     Makes one task (child) a subtask of another task (parent).
@@ -657,9 +732,6 @@ async def ticktick_make_subtask(parent_task_id: str, child_task_id: str) -> str:
           }
         - If tasks are in different projects, suggest moving them to the same project first
     """
-    if not isinstance(child_task_id, str) or not isinstance(parent_task_id, str):
-         return format_response({"error": "Invalid input: child_task_id and parent_task_id must be strings."})
-
     if child_task_id == parent_task_id:
          return format_response({"error": "Child and parent task IDs cannot be the same."})
 
@@ -667,11 +739,11 @@ async def ticktick_make_subtask(parent_task_id: str, child_task_id: str) -> str:
         client = TickTickClientSingleton.get_client()
 
         child_task_obj = client.get_by_id(child_task_id)
-        if not child_task_obj or not isinstance(child_task_obj, dict) or not child_task_obj.get('projectId'):
+        if not _is_task(child_task_obj):
             return format_response({"error": f"Child task with ID {child_task_id} not found or invalid.", "status": "not_found"})
 
         parent_task_obj = client.get_by_id(parent_task_id)
-        if not parent_task_obj or not isinstance(parent_task_obj, dict) or not parent_task_obj.get('projectId'):
+        if not _is_task(parent_task_obj):
             return format_response({"error": f"Parent task with ID {parent_task_id} not found or invalid.", "status": "not_found"})
 
         # Constraint check: Ensure tasks are in the same project
@@ -683,7 +755,7 @@ async def ticktick_make_subtask(parent_task_id: str, child_task_id: str) -> str:
             })
 
         # The API call uses the child object and the parent ID string
-        result_subtask = client.task.make_subtask(child_task_obj, parent_task_id)
+        result_subtask = await asyncio.to_thread(client.task.make_subtask, child_task_obj, parent_task_id)
 
         # Fetch parent task again to show updated subtasks/structure in the response
         updated_parent_task_obj = client.get_by_id(parent_task_id)
@@ -694,7 +766,7 @@ async def ticktick_make_subtask(parent_task_id: str, child_task_id: str) -> str:
              "updated_parent_task": updated_parent_task_obj,
              "api_response": result_subtask # Include raw API response if needed
         })
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to make task {child_task_id} a subtask of {parent_task_id}: {e}", exc_info=True)
         return format_response({"error": f"Failed to make task {child_task_id} a subtask of {parent_task_id}: {e}"})
 
@@ -744,15 +816,21 @@ async def ticktick_get_by_id(obj_id: str) -> str:
     """
     try:
         client = TickTickClientSingleton.get_client()
-        obj = client.get_by_id(obj_id)
+        # Repeated lookups are served from the cached state index; misses fall back to
+        # get_by_id so the not-found response stays the library's own
+        obj = _get_state_index(client).get(obj_id) or client.get_by_id(obj_id)
         return format_response(obj)
-    except Exception as e:
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to get object with ID {obj_id}: {e}", exc_info=True)
         return format_response({"error": f"Failed to get object with ID {obj_id}: {e}"})
 
+# Searches served by ticktick_get_all other than "tasks", mapped to their client state key
+_GET_ALL_STATE_KEYS = {"projects": "projects", "tags": "tags"}
+_GET_ALL_SEARCHES = frozenset({"tasks", *_GET_ALL_STATE_KEYS})
+
 @mcp.tool()
 @require_ticktick_client
-async def ticktick_get_all(search: str) -> str:
+async def ticktick_get_all(search: str, page: int = 0, page_size: Optional[int] = None) -> str:
     """
     Retrieves a list of all TickTick objects of a specified type.
 
@@ -760,10 +838,20 @@ async def ticktick_get_all(search: str) -> str:
         search (str): The type of objects to retrieve. Required.
                      Common values: "tasks", "projects", "tags", "habits", "filters"
                      Case insensitive but should match one of the supported types.
+        page (int, optional): Zero-based page to return when page_size is set. Defaults to 0.
+        page_size (int, optional): Maximum number of objects per page. If omitted, all objects
+                                   are returned at once.
 
     Returns:
         A JSON string with one of the following structures:
         - Success: A list of objects of the requested type (may be empty)
+        - Paginated success (page_size set): {
+            "items": list of objects on this page,
+            "page": current page,
+            "page_size": page size,
+            "total": total number of objects,
+            "next_page": page to request next, or null on the last page
+          }
         - Error: {"error": "Error message describing what went wrong"}
 
     Limitations:
@@ -784,6 +872,13 @@ async def ticktick_get_all(search: str) -> str:
             "search": "tags"
         }
 
+        Get uncompleted tasks 500 at a time:
+        {
+            "search": "tasks",
+            "page": 0,
+            "page_size": 500
+        }
+
     Agent Usage Guide:
         - Use this tool to get a comprehensive list of a specific object type
         - Particularly useful for discovering available projects, tags
@@ -792,28 +887,34 @@ async def ticktick_get_all(search: str) -> str:
           "projects" → list all projects
           "tasks" → list all uncompleted tasks
           "tags" → list all tags
+        - For large accounts, pass page_size and keep requesting next_page until it is null
         - Example mapping:
           "Show me all my projects" → {"search": "projects"}
           "List all my tags" → {"search": "tags"}
     """
     try:
         client = TickTickClientSingleton.get_client()
-        if not client:
-            raise ToolLogicError("TickTick client is not available.")
-        
+
         # Get all tasks initially treats search as case-sensitive
         search_lower = search.lower()
-        client.sync()
+        if search_lower not in _GET_ALL_SEARCHES:
+            return format_response({"error": f"Invalid search type: {search}"})
+        await asyncio.to_thread(client.sync)
         if search_lower == "tasks":
-            all_items = _get_all_tasks_from_ticktick()
+            # The sync just refreshed state, so don't serve tasks cached before it
+            invalidate_tasks_cache()
+            tasks = await _get_all_tasks_cached()
+            # Project order from state, then task id, so pages stay stable across refreshes
+            project_rank = {pid: rank for rank, pid in enumerate(_get_project_ids(client))}
+            all_items = sorted(tasks, key=lambda t: (project_rank.get(t.get('projectId'), len(project_rank)), str(t.get('id', ''))))
         elif search_lower == "projects":
-            projects = [ { "id": client.inbox_id, "name": "Inbox" } ] + client.state['projects']
-            return format_response(projects)
-        elif search_lower == "tags":
-            all_items = client.state['tags']
-            return format_response(all_items)
+            # The inbox is not part of the projects state, list it first
+            all_items = [ { "id": client.inbox_id, "name": "Inbox" }, *_state_list(client, 'projects') ]
         else:
-            return format_response({"error": f"Invalid search type: {search}"})
-    except Exception as e:
+            all_items = _state_list(client, _GET_ALL_STATE_KEYS[search_lower]) or []
+        if page_size is not None:
+            return format_response(_paginate(all_items, page, page_size))
+        return format_response(all_items)
+    except TICKTICK_API_ERRORS as e:
         logging.error(f"Failed to get all items of type {search}: {e}", exc_info=True)
         return format_response({"error": f"Failed to get all items of type {search}: {e}"})